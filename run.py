@@ -1,14 +1,21 @@
 import asyncio
 import os
+import re
+import sys
+import threading
 import json
-import aiohttp
+import orjson
+import httpx
 import warnings
 import argparse
+import anyio
+from collections import deque
+from contextlib import AsyncExitStack
 from pathlib import Path
 from mcp.client.stdio import stdio_client, StdioServerParameters
 from mcp.client.session import ClientSession
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, Tuple
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,24 +23,297 @@ load_dotenv()
 # Suppress specific warnings
 os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
 
+# Environment variables passed through to the MCP server
+_MCP_ENV_KEYS = (
+    "UMAMI_API_URL",
+    "UMAMI_USERNAME",
+    "UMAMI_PASSWORD",
+    "UMAMI_TEAM_ID",
+)
+
+# Errors meaning the MCP server's stdio transport is gone
+_MCP_TRANSPORT_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+# Metric types requested from get_website_metrics
+METRIC_TYPES = ("url", "referrer", "browser", "os", "device", "country", "event")
+
+# Phrases in an AI response that suggest fabricated data
+HALLUCINATION_INDICATORS = (
+    # Common fake numbers
+    "1,234,567",
+    "45,678",
+    "12,345",
+    "100,000",
+    "50,000",
+    # Generic metrics without real data
+    "Total pageviews: 1",
+    "Unique visitors: 1",
+    # Placeholder language
+    "fictional",
+    "example data",
+    "placeholder",
+    "sample data",
+    "dummy data",
+    "test data",
+    "mock data",
+    # Vague time references without real data
+    "peak hours",
+    "busy periods",
+    "high traffic times",
+    # Made-up percentages
+    "45% increase",
+    "30% bounce rate",
+    "25% growth",
+)
+# Zero-width lookahead so overlapping indicators are all reported
+HALLUCINATION_RE = re.compile(
+    "(?=(" + "|".join(re.escape(i) for i in HALLUCINATION_INDICATORS) + "))",
+    re.IGNORECASE,
+)
+
+# Prompt templates; only the variable fields are substituted per call
+_VALIDATION_TMPL = """You are an expert analytics consultant creating a dashboard based on REAL data from an analytics system.
+
+DASHBOARD CREATION GUIDE:
+{guide}
+
+ACTUAL DATA FROM ANALYTICS SYSTEM:
+{data}
+
+CRITICAL REQUIREMENTS:
+1. ONLY use the real data provided above - NEVER fabricate numbers
+2. If data is missing/unavailable, clearly state this and explain why
+3. Provide actionable insights based on available data
+4. Suggest specific next steps for missing data
+5. Create visualizations only for data that actually exists
+6. Be transparent about data limitations
+
+ANALYSIS TARGET:
+- Website: {domain}
+- Period: {period}
+- Timezone: {tz}
+
+Create a comprehensive dashboard analysis using ONLY the real data provided."""
+
+_CHAT_TMPL = """You are an expert analytics consultant answering questions about website analytics data.
+
+CONTEXT - AVAILABLE DATA:
+{data}
+
+USER QUESTION: {q}
+
+GUIDELINES:
+1. Answer based ONLY on the real data provided above
+2. If the data doesn't contain information to answer the question, say so clearly
+3. Provide specific insights and recommendations when possible
+4. Suggest what additional data might be needed if the question can't be fully answered
+5. Be conversational but professional
+6. Refer to specific metrics and time periods from the data when relevant
+
+Answer the user's question about the website analytics:"""
+
+
+# Header the model is asked to put before each answer in a batched chat prompt
+_BATCH_ANSWER_RE = re.compile(r"^#+\s*Answer\s+(\d+)\b.*$", re.MULTILINE)
+
+
+def dumps_pretty(data: Any) -> str:
+    """Serialize data as indented JSON, stringifying unsupported types"""
+    return orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2).decode()
+
+
+def split_batch_answers(response: str, count: int) -> list:
+    """Split a batched chat response on its "### Answer N" headers"""
+    matches = list(_BATCH_ANSWER_RE.finditer(response))
+    answers = {}
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(response)
+        answers[int(match.group(1))] = response[match.end() : end].strip()
+    return [answers.get(i, response) for i in range(1, count + 1)]
+
+
+class _MCPSessionHolder:
+    """Keep one initialized MCP client session open across dashboard runs.
+
+    The server subprocess is spawned and the session initialized on the first
+    get(); later calls reuse it until invalidate() marks it dead, after which
+    the next get() reconnects. stdio_client relies on anyio cancel scopes, so
+    get() and aclose() must run in the same task.
+    """
+
+    def __init__(self, server_params: StdioServerParameters):
+        self._server_params = server_params
+        self._stack: Optional[AsyncExitStack] = None
+        self._session: Optional[ClientSession] = None
+        self._stale = False
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        """Mark the session dead so the next get() reconnects"""
+        if self._session is not None:
+            self._stale = True
+
+    async def get(self) -> Optional[ClientSession]:
+        """Return the session, or None if the server failed to initialize"""
+        async with self._lock:
+            if self._stale:
+                try:
+                    await self.aclose()
+                except Exception as e:
+                    print(f"Error closing dead MCP session: {e}")
+
+            if self._session is not None:
+                print("✅ Reusing MCP session")
+                return self._session
+
+            stack = AsyncExitStack()
+            try:
+                read, write = await stack.enter_async_context(
+                    stdio_client(self._server_params)
+                )
+                session = await stack.enter_async_context(ClientSession(read, write))
+                print("✅ Connected to MCP server")
+
+                # Initialize session
+                try:
+                    await session.initialize()
+                    print("✅ Session initialized")
+                except Exception as init_error:
+                    print(f"❌ Initialization error: {init_error}")
+                    await stack.aclose()
+                    return None
+            except BaseException:
+                await stack.aclose()
+                raise
+
+            self._stack, self._session = stack, session
+            return session
+
+    async def aclose(self):
+        self._stale = False
+        if self._stack is not None:
+            stack, self._stack, self._session = self._stack, None, None
+            await stack.aclose()
+
+
+class _StdinLines:
+    """Read stdin on one daemon thread and route lines to the active chat"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buffer = deque()  # lines read while no chat is attached
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._eof = False
+        self._thread: Optional[threading.Thread] = None
+
+    def attach(self, queue: asyncio.Queue):
+        """Start delivering lines (and None at EOF) to queue"""
+        with self._lock:
+            self._queue, self._loop = queue, asyncio.get_running_loop()
+            while self._buffer:
+                queue.put_nowait(self._buffer.popleft())
+            if self._eof:
+                queue.put_nowait(None)
+        if self._thread is None:
+            # A daemon thread, unlike asyncio.to_thread, can be left blocked in
+            # readline() at exit without holding up interpreter shutdown
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def detach(self, queue: asyncio.Queue):
+        """Stop delivering to queue and keep any lines it didn't consume"""
+        with self._lock:
+            if self._queue is queue:
+                self._queue = self._loop = None
+            leftover = []
+            while not queue.empty():
+                line = queue.get_nowait()
+                if line is not None:
+                    leftover.append(line)
+            self._buffer.extendleft(reversed(leftover))
+
+    def _put(self, queue: asyncio.Queue, line: Optional[str]):
+        # Runs on the event loop; the chat may have detached since scheduling
+        with self._lock:
+            if self._queue is queue:
+                queue.put_nowait(line)
+            elif line is not None:
+                self._buffer.append(line)
+
+    def _deliver(self, line: Optional[str]):
+        with self._lock:
+            if line is None:
+                self._eof = True
+            queue, loop = self._queue, self._loop
+            if queue is None:
+                if line is not None:
+                    self._buffer.append(line)
+                return
+        try:
+            loop.call_soon_threadsafe(self._put, queue, line)
+        except RuntimeError:  # event loop already closed
+            if line is not None:
+                with self._lock:
+                    self._buffer.append(line)
+
+    def _run(self):
+        for line in iter(sys.stdin.readline, ""):
+            self._deliver(line)
+        self._deliver(None)
+
 
 class AnalyticsDashboard:
-    def __init__(self, mcp_server_dir: str, ai_provider: str = "cloudflare"):
+    def __init__(
+        self, mcp_server_dir: str, ai_provider: str = "cloudflare", debug: bool = False
+    ):
         self.mcp_server_dir = mcp_server_dir
         self.ai_provider = ai_provider.lower()
-        self.setup_mcp_server()
+        self._debug = debug
+        self.server_params: Optional[StdioServerParameters] = None
+        self._mcp_holder: Optional[_MCPSessionHolder] = None
         self.setup_ai_clients()
         self.session_data = {}  # Store data for chat mode
+        self._session_data_json = "{}"  # Serialized once per session
+        self._domain_to_id: Dict[str, str] = {}
+        self._http: Optional[httpx.AsyncClient] = None
+        self._mcp_sem: Optional[asyncio.Semaphore] = None
+        self._stdin: Optional[_StdinLines] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the MCP session and the shared HTTP client"""
+        if self._mcp_holder is not None:
+            await self._mcp_holder.aclose()
+            self._mcp_holder = None
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+
+    async def _get_http_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP/2 client, creating it on first use"""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                http2=True,
+                timeout=60.0,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            )
+        return self._http
 
     def setup_mcp_server(self):
         """Setup MCP server parameters"""
-        keys = [
-            "UMAMI_API_URL",
-            "UMAMI_USERNAME",
-            "UMAMI_PASSWORD",
-            "UMAMI_TEAM_ID",
-        ]
-        env_vars = {k: os.environ[k] for k in keys if k in os.environ}
+        env_vars = {k: v for k in _MCP_ENV_KEYS if (v := os.environ.get(k)) is not None}
         env_vars["TOKENIZERS_PARALLELISM"] = "false"
         env_vars["PYTHONWARNINGS"] = "ignore:resource_tracker:UserWarning"
 
@@ -48,16 +328,57 @@ class AnalyticsDashboard:
             env=env_vars,
         )
 
+    def _debug_event(self, event: str, **fields):
+        """Write a diagnostic event as a JSON line straight to stdout's buffer"""
+        sys.stdout.flush()  # keep ordering with text-mode prints
+        sys.stdout.buffer.write(orjson.dumps({"event": event, **fields}, default=str))
+        sys.stdout.buffer.write(b"\n")
+        sys.stdout.buffer.flush()
+
+    async def _ensure_server_params(self) -> StdioServerParameters:
+        """Build MCP server parameters on first use"""
+        if self.server_params is None:
+            self.setup_mcp_server()
+        return self.server_params
+
+    def _get_mcp_semaphore(self) -> asyncio.Semaphore:
+        """Return the semaphore capping in-flight MCP tool calls"""
+        if self._mcp_sem is None:
+            value = os.environ.get("MCP_MAX_CONCURRENCY", "8")
+            try:
+                limit = int(value)
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                raise ValueError(
+                    f"MCP_MAX_CONCURRENCY must be a positive integer, got {value!r}"
+                )
+            self._mcp_sem = asyncio.Semaphore(limit)
+        return self._mcp_sem
+
+    async def _get_mcp_session(self) -> Optional[ClientSession]:
+        """Return the shared MCP session, connecting on first use"""
+        if self._mcp_holder is None:
+            # Validate MCP_MAX_CONCURRENCY before spawning the server
+            self._get_mcp_semaphore()
+            self._mcp_holder = _MCPSessionHolder(await self._ensure_server_params())
+        return await self._mcp_holder.get()
+
+    def _check_mcp_error(self, error: BaseException):
+        """Drop the shared MCP session if error means its transport is gone"""
+        if self._mcp_holder is not None and isinstance(error, _MCP_TRANSPORT_ERRORS):
+            self._mcp_holder.invalidate()
+
     def setup_ai_clients(self):
         """Setup AI client configurations"""
         self.CLOUDFLARE_ACCOUNT_ID = os.environ.get("CLOUDFLARE_ACCOUNT_ID")
         self.CLOUDFLARE_API_TOKEN = os.environ.get("CLOUDFLARE_API_TOKEN")
         self.GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 
-    async def call_cloudflare_ai(
+    async def stream_cloudflare_ai(
         self, prompt: str, model: str = "@cf/meta/llama-3.1-8b-instruct"
-    ) -> str:
-        """Call Cloudflare Workers AI"""
+    ) -> AsyncIterator[str]:
+        """Stream a Cloudflare Workers AI response as it is generated"""
         if not self.CLOUDFLARE_ACCOUNT_ID or not self.CLOUDFLARE_API_TOKEN:
             raise ValueError(
                 "Missing CLOUDFLARE_ACCOUNT_ID or CLOUDFLARE_API_TOKEN environment variables"
@@ -74,21 +395,47 @@ class AnalyticsDashboard:
             "messages": [{"role": "user", "content": prompt}],
             "max_tokens": 2048,
             "temperature": 0.1,
+            "stream": True,
         }
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, json=payload) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise RuntimeError(
-                        f"Cloudflare AI error ({response.status}): {error_text}"
-                    )
+        client = await self._get_http_client()
+        async with client.stream(
+            "POST", url, headers=headers, json=payload
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise RuntimeError(
+                    f"Cloudflare AI error ({response.status_code}): {response.text}"
+                )
+
+            content_type = response.headers.get("content-type", "")
+            if not content_type.startswith("text/event-stream"):
+                # Errors come back as a regular JSON body rather than a stream
+                await response.aread()
+                raise RuntimeError(f"Cloudflare AI API error: {response.text}")
+
+            # Server-sent events: "data: {...}" lines ending with "data: [DONE]"
+            received = False
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                data = line[6:]
+                if data == "[DONE]":
+                    break
+                chunk = orjson.loads(data)
+                if chunk.get("response"):
+                    received = True
+                    yield chunk["response"]
 
-                result = await response.json()
-                if not result.get("success"):
-                    raise RuntimeError(f"Cloudflare AI API error: {result}")
+            if not received:
+                raise RuntimeError("Cloudflare AI returned an empty response")
 
-                return result["result"]["response"].strip()
+    async def call_cloudflare_ai(
+        self, prompt: str, model: str = "@cf/meta/llama-3.1-8b-instruct"
+    ) -> str:
+        """Call Cloudflare Workers AI"""
+        chunks = [chunk async for chunk in self.stream_cloudflare_ai(prompt, model)]
+        return "".join(chunks).strip()
 
     async def call_ollama(self, prompt: str, model: str = "llama3.2") -> str:
         """Call Ollama locally"""
@@ -102,12 +449,32 @@ class AnalyticsDashboard:
                 stderr=asyncio.subprocess.PIPE,
             )
 
-            stdout, stderr = await proc.communicate(input=prompt.encode())
+            async def read_stdout():
+                # Fixed-size reads; readline() fails on lines over 64 KiB
+                chunks = []
+                while chunk := await proc.stdout.read(65536):
+                    chunks.append(chunk)
+                return chunks
+
+            # Start reading both pipes before writing the prompt so neither can
+            # fill up, and an early exit still leaves its error in stderr
+            stdout_task = asyncio.create_task(read_stdout())
+            stderr_task = asyncio.create_task(proc.stderr.read())
+            try:
+                proc.stdin.write(prompt.encode())
+                await proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # Ollama exited early; stderr says why
+            finally:
+                proc.stdin.close()
+
+            chunks, stderr = await asyncio.gather(stdout_task, stderr_task)
+            await proc.wait()
 
             if proc.returncode != 0:
                 raise RuntimeError(f"Ollama error: {stderr.decode()}")
 
-            return stdout.decode().strip()
+            return b"".join(chunks).decode().strip()
         except FileNotFoundError:
             raise RuntimeError("Ollama is not installed or not in PATH")
 
@@ -164,8 +531,6 @@ class AnalyticsDashboard:
 
             # The CLI might include extra formatting, so clean it up
             # Remove any ANSI color codes or extra whitespace
-            import re
-
             response = re.sub(r"\x1b\[[0-9;]*m", "", response)  # Remove ANSI codes
             response = response.strip()
 
@@ -198,44 +563,76 @@ class AnalyticsDashboard:
                 raise ValueError(f"Unsupported AI provider: {self.ai_provider}")
 
         except Exception as e:
-            print(f"Primary AI provider ({self.ai_provider}) failed: {e}")
+            return await self.call_fallback_providers(prompt, e)
 
-            # Fallback logic
-            if self.ai_provider != "cloudflare":
-                try:
-                    print("Falling back to Cloudflare...")
-                    response = await self.call_cloudflare_ai(prompt)
-                    return response, "cloudflare-fallback"
-                except Exception as cf_error:
-                    print(f"Cloudflare fallback failed: {cf_error}")
+    async def call_fallback_providers(
+        self, prompt: str, error: Exception
+    ) -> Tuple[str, str]:
+        """Try the providers other than the primary one after it failed"""
+        print(f"Primary AI provider ({self.ai_provider}) failed: {error}")
 
-            if self.ai_provider != "ollama":
-                try:
-                    print("Falling back to Ollama...")
-                    response = await self.call_ollama(prompt)
-                    return response, "ollama-fallback"
-                except Exception as ollama_error:
-                    print(f"Ollama fallback failed: {ollama_error}")
-
-            raise RuntimeError(f"All AI providers failed. Primary error: {e}")
-
-    def get_website_id_from_domain(
-        self, websites_data: list, domain: str
-    ) -> Optional[str]:
-        """Extract website ID from the websites list based on domain"""
+        if self.ai_provider != "cloudflare":
+            try:
+                print("Falling back to Cloudflare...")
+                response = await self.call_cloudflare_ai(prompt)
+                return response, "cloudflare-fallback"
+            except Exception as cf_error:
+                print(f"Cloudflare fallback failed: {cf_error}")
+
+        if self.ai_provider != "ollama":
+            try:
+                print("Falling back to Ollama...")
+                response = await self.call_ollama(prompt)
+                return response, "ollama-fallback"
+            except Exception as ollama_error:
+                print(f"Ollama fallback failed: {ollama_error}")
+
+        raise RuntimeError(f"All AI providers failed. Primary error: {error}")
+
+    async def stream_ai_provider(self, prompt: str) -> AsyncIterator[Tuple[str, str]]:
+        """Stream (chunk, provider) pairs, falling back to a buffered call"""
+        if self.ai_provider == "cloudflare":
+            started = False
+            try:
+                async for chunk in self.stream_cloudflare_ai(prompt):
+                    if not started:
+                        chunk = chunk.lstrip()
+                        started = True
+                    yield chunk, "cloudflare"
+                return
+            except Exception as e:
+                # Once output has reached the user there is nothing to retry
+                if started:
+                    raise
+                response, ai_provider = await self.call_fallback_providers(prompt, e)
+        else:
+            response, ai_provider = await self.call_ai_provider(prompt)
+        yield response, ai_provider
+
+    def _build_domain_index(self, websites_data: list) -> Dict[str, str]:
+        """Parse the websites list once into a domain -> website ID map"""
+        index = {}
         try:
             if isinstance(websites_data, list) and len(websites_data) > 0:
                 # Handle the case where websites_data is wrapped in TextContent
                 websites_content = websites_data[0]
                 if hasattr(websites_content, "text"):
-                    websites_json = json.loads(websites_content.text)
+                    websites_json = orjson.loads(websites_content.text)
                     for website in websites_json.get("data", []):
-                        if website.get("domain") == domain:
-                            return website.get("id")
-            return None
-        except (json.JSONDecodeError, KeyError, AttributeError) as e:
+                        # Keep the first ID seen for a domain
+                        index.setdefault(website.get("domain"), website.get("id"))
+        except (
+            json.JSONDecodeError,
+            orjson.JSONDecodeError,
+            KeyError,
+            AttributeError,
+        ) as e:
             print(f"Error parsing websites data: {e}")
-            return None
+        return index
+
+    def get_website_id_from_domain(self, domain: str) -> Optional[str]:
+        """Look up a website ID by domain in the cached websites index"""
+        return self._domain_to_id.get(domain)
 
     async def get_real_data_from_mcp(
         self,
@@ -252,44 +649,69 @@ class AnalyticsDashboard:
             "timezone": timezone,
         }
 
+        # Cap in-flight MCP tool calls so the fan-out doesn't overload the server
+        mcp_sem = self._get_mcp_semaphore()
+
+        async def _call(name, args):
+            async with mcp_sem:
+                try:
+                    return await session.call_tool(name, args)
+                except Exception as e:
+                    self._check_mcp_error(e)
+                    raise
+
+        async def _safe(name, coro):
+            try:
+                return name, await coro
+            except Exception as e:
+                return name, e
+
         try:
             # List available tools
             tools_response = await session.list_tools()
             available_tools = [tool.name for tool in tools_response.tools]
-            print(f"Available MCP tools: {available_tools}")
+            if self._debug:
+                self._debug_event("available_tools", tools=available_tools)
             real_data["available_tools"] = available_tools
 
-            # Get website HTML contents
+            # Get website HTML contents and the website list concurrently;
+            # neither depends on the other
+            first_stage = []
             if "get_html" in available_tools:
-                try:
-                    html_result = await session.call_tool("get_html", {})
-                    real_data["html"] = html_result.content
-                except Exception as e:
-                    print(f"Error getting html: {e}")
-                    real_data["html_error"] = str(e)
-                    return real_data
-
-            # Get website list to find the correct website ID
+                first_stage.append(("html", _call("get_html", {})))
             if "get_websites" in available_tools:
-                try:
-                    websites_result = await session.call_tool("get_websites", {})
-                    real_data["websites"] = websites_result.content
-                    print(f"Available websites: {len(websites_result.content)} found")
-
-                    # Extract website ID for the domain
-                    website_id = self.get_website_id_from_domain(
-                        websites_result.content, website_domain
-                    )
-                    if website_id:
-                        real_data["website_id"] = website_id
-                        print(f"Found website ID for {website_domain}: {website_id}")
-                    else:
-                        print(f"Could not find website ID for domain: {website_domain}")
-                        return real_data
+                first_stage.append(("websites", _call("get_websites", {})))
+            first_results = dict(
+                await asyncio.gather(*[_safe(n, c) for n, c in first_stage])
+            )
 
-                except Exception as e:
-                    print(f"Error getting websites: {e}")
-                    real_data["websites_error"] = str(e)
+            html_result = first_results.get("html")
+            if isinstance(html_result, Exception):
+                print(f"Error getting html: {html_result}")
+                real_data["html_error"] = str(html_result)
+                return real_data
+            elif html_result is not None:
+                real_data["html"] = html_result.content
+
+            # Use the website list to find the correct website ID
+            websites_result = first_results.get("websites")
+            if isinstance(websites_result, Exception):
+                print(f"Error getting websites: {websites_result}")
+                real_data["websites_error"] = str(websites_result)
+                return real_data
+            elif websites_result is not None:
+                real_data["websites"] = websites_result.content
+                if self._debug:
+                    self._debug_event("websites", count=len(websites_result.content))
+
+                # Extract website ID for the domain
+                self._domain_to_id = self._build_domain_index(websites_result.content)
+                website_id = self.get_website_id_from_domain(website_domain)
+                if website_id:
+                    real_data["website_id"] = website_id
+                    print(f"Found website ID for {website_domain}: {website_id}")
+                else:
+                    print(f"Could not find website ID for domain: {website_domain}")
                     return real_data
 
             # Now try other endpoints with the correct website_id and parameters
@@ -298,87 +720,97 @@ class AnalyticsDashboard:
                 print("No website ID available, skipping other API calls")
                 return real_data
 
+            # These calls are independent once website_id is known, so fire
+            # them all at once and dispatch the results by name
+            tasks = []
+
             # Get website stats with proper parameters
             if "get_website_stats" in available_tools:
-                try:
-                    stats_result = await session.call_tool(
-                        "get_website_stats",
-                        {
-                            "website_id": website_id,
-                            "start_at": start_date,
-                            "end_at": end_date,
-                        },
+                tasks.append(
+                    (
+                        "website_stats",
+                        _call(
+                            "get_website_stats",
+                            {
+                                "website_id": website_id,
+                                "start_at": start_date,
+                                "end_at": end_date,
+                            },
+                        ),
                     )
-                    real_data["website_stats"] = stats_result.content
-                    print(f"Successfully retrieved website stats")
-                except Exception as e:
-                    print(f"Error getting website stats: {e}")
-                    real_data["stats_error"] = str(e)
+                )
 
             # Get pageview series with proper parameters
             if "get_pageview_series" in available_tools:
-                try:
-                    pageview_result = await session.call_tool(
-                        "get_pageview_series",
+                tasks.append(
+                    (
+                        "pageview_series",
+                        _call(
+                            "get_pageview_series",
+                            {
+                                "website_id": website_id,
+                                "start_at": start_date,
+                                "end_at": end_date,
+                                "unit": "day",  # or "hour", "month"
+                                "timezone": timezone,
+                            },
+                        ),
+                    )
+                )
+
+            # Get website metrics for every metric type in one batch
+            metric_calls = []
+            if "get_website_metrics" in available_tools:
+                metric_calls = [
+                    _call(
+                        "get_website_metrics",
                         {
                             "website_id": website_id,
                             "start_at": start_date,
                             "end_at": end_date,
-                            "unit": "day",  # or "hour", "month"
-                            "timezone": timezone,
+                            "type": metric_type,
                         },
                     )
-                    real_data["pageview_series"] = pageview_result.content
-                    print(f"Successfully retrieved pageview series")
-                except Exception as e:
-                    print(f"Error getting pageview series: {e}")
-                    real_data["pageview_error"] = str(e)
-
-            # Get website metrics with proper parameters
-            if "get_website_metrics" in available_tools:
-                try:
-                    # Try different metric types
-                    for metric_type in [
-                        "url",
-                        "referrer",
-                        "browser",
-                        "os",
-                        "device",
-                        "country",
-                        "event",
-                    ]:
-                        try:
-                            metrics_result = await session.call_tool(
-                                "get_website_metrics",
-                                {
-                                    "website_id": website_id,
-                                    "start_at": start_date,
-                                    "end_at": end_date,
-                                    "type": metric_type,
-                                },
-                            )
-                            real_data[f"metrics_{metric_type}"] = metrics_result.content
-                            print(f"Successfully retrieved {metric_type} metrics")
-                        except Exception as e:
-                            print(f"Could not retrieve {metric_type} metrics: {e}")
-                            continue
-                except Exception as e:
-                    print(f"Error getting website metrics: {e}")
-                    real_data["metrics_error"] = str(e)
+                    for metric_type in METRIC_TYPES
+                ]
 
             # Get active visitors (this might still fail based on your output)
             if "get_active_visitors" in available_tools:
-                try:
-                    active_result = await session.call_tool(
-                        "get_active_visitors", {"website_id": website_id}
+                tasks.append(
+                    (
+                        "active_visitors",
+                        _call("get_active_visitors", {"website_id": website_id}),
                     )
-                    real_data["active_visitors"] = active_result.content
-                    print(f"Successfully retrieved active visitors")
-                except Exception as e:
-                    print(f"Error getting active visitors (expected): {e}")
-                    real_data["active_visitors_error"] = str(e)
-
+                )
+
+            error_keys = {
+                "website_stats": "stats_error",
+                "pageview_series": "pageview_error",
+            }
+            results, metric_results = await asyncio.gather(
+                asyncio.gather(*[_safe(n, c) for n, c in tasks]),
+                asyncio.gather(*metric_calls, return_exceptions=True),
+            )
+            for name, result in results:
+                if isinstance(result, Exception):
+                    print(f"Error getting {name}: {result}")
+                    real_data[error_keys.get(name, f"{name}_error")] = str(result)
+                else:
+                    real_data[name] = result.content
+                    if self._debug:
+                        self._debug_event("retrieved", name=name)
+
+            for metric_type, result in zip(METRIC_TYPES, metric_results):
+                if isinstance(result, Exception):
+                    print(f"Could not retrieve {metric_type} metrics: {result}")
+                    real_data[f"metrics_{metric_type}"] = None
+                    real_data[f"metrics_{metric_type}_error"] = str(result)
+                else:
+                    real_data[f"metrics_{metric_type}"] = result.content
+                    if self._debug:
+                        self._debug_event("retrieved", name=f"metrics_{metric_type}")
         except Exception as e:
+            self._check_mcp_error(e)
             print(f"Error getting real data: {e}")
             real_data["general_error"] = str(e)
 
@@ -388,89 +820,44 @@ class AnalyticsDashboard:
         self, mcp_prompt: str, real_data: Dict[str, Any]
     ) -> str:
         """Create a comprehensive validation prompt"""
-        real_data_str = json.dumps(real_data, indent=2, default=str)
-
-        prompt = f"""You are an expert analytics consultant creating a dashboard based on REAL data from an analytics system.
-
-DASHBOARD CREATION GUIDE:
-{mcp_prompt}
-
-ACTUAL DATA FROM ANALYTICS SYSTEM:
-{real_data_str}
-
-CRITICAL REQUIREMENTS:
-1. ONLY use the real data provided above - NEVER fabricate numbers
-2. If data is missing/unavailable, clearly state this and explain why
-3. Provide actionable insights based on available data
-4. Suggest specific next steps for missing data
-5. Create visualizations only for data that actually exists
-6. Be transparent about data limitations
-
-ANALYSIS TARGET:
-- Website: {real_data.get('website_domain', 'Unknown')}
-- Period: {real_data.get('date_range', 'Unknown')}
-- Timezone: {real_data.get('timezone', 'Unknown')}
-
-Create a comprehensive dashboard analysis using ONLY the real data provided."""
+        if real_data is self.session_data:
+            real_data_str = self._session_data_json
+        else:
+            # Keep large encodes off the event loop
+            real_data_str = await asyncio.to_thread(dumps_pretty, real_data)
+
+        prompt = _VALIDATION_TMPL.format(
+            guide=mcp_prompt,
+            data=real_data_str,
+            domain=real_data.get("website_domain", "Unknown"),
+            period=real_data.get("date_range", "Unknown"),
+            tz=real_data.get("timezone", "Unknown"),
+        )
+        if self._debug:
+            # Writing a multi-KB prompt can stall the event loop
+            await asyncio.to_thread(self._debug_event, "debug_prompt", prompt=prompt)
         return prompt
 
     async def create_chat_prompt(self, user_question: str) -> str:
         """Create a chat prompt with context from the session data"""
-        real_data_str = json.dumps(self.session_data, indent=2, default=str)
-
-        return f"""You are an expert analytics consultant answering questions about website analytics data.
-
-CONTEXT - AVAILABLE DATA:
-{real_data_str}
-
-USER QUESTION: {user_question}
-
-GUIDELINES:
-1. Answer based ONLY on the real data provided above
-2. If the data doesn't contain information to answer the question, say so clearly
-3. Provide specific insights and recommendations when possible
-4. Suggest what additional data might be needed if the question can't be fully answered
-5. Be conversational but professional
-6. Refer to specific metrics and time periods from the data when relevant
-
-Answer the user's question about the website analytics:"""
+        return _CHAT_TMPL.format(data=self._session_data_json, q=user_question)
+
+    async def create_batch_chat_prompt(self, questions: list) -> str:
+        """Create a single chat prompt answering several questions at once"""
+        numbered = "\n".join(f"{i}) {q}" for i, q in enumerate(questions, 1))
+        return _CHAT_TMPL.format(
+            data=self._session_data_json,
+            q=(
+                "Answer each of the following separately, starting each answer "
+                'with a line "### Answer N" where N is the question number:\n'
+                f"{numbered}"
+            ),
+        )
 
     def detect_hallucinations(self, ai_response: str) -> list:
         """Enhanced hallucination detection"""
-        hallucination_indicators = [
-            # Common fake numbers
-            "1,234,567",
-            "45,678",
-            "12,345",
-            "100,000",
-            "50,000",
-            # Generic metrics without real data
-            "Total pageviews: 1",
-            "Unique visitors: 1",
-            # Placeholder language
-            "fictional",
-            "example data",
-            "placeholder",
-            "sample data",
-            "dummy data",
-            "test data",
-            "mock data",
-            # Vague time references without real data
-            "peak hours",
-            "busy periods",
-            "high traffic times",
-            # Made-up percentages
-            "45% increase",
-            "30% bounce rate",
-            "25% growth",
-        ]
-
-        found_indicators = []
-        for indicator in hallucination_indicators:
-            if indicator.lower() in ai_response.lower():
-                found_indicators.append(indicator)
-
-        return found_indicators
+        found = {m.group(1).lower() for m in HALLUCINATION_RE.finditer(ai_response)}
+        return [i for i in HALLUCINATION_INDICATORS if i.lower() in found]
 
     async def chat_mode(self):
         """Interactive chat mode for asking questions about the data"""
@@ -495,11 +882,14 @@ Answer the user's question about the website analytics:"""
 
                 # Get AI response
                 print(f"\n🤔 Thinking with {self.ai_provider}...")
-                ai_response, ai_provider = await self.call_ai_provider(chat_prompt)
-
-                print(f"\n💬 {ai_provider.upper()} Response:")
-                print("-" * 50)
-                print(ai_response)
+                header_printed = False
+                async for chunk, ai_provider in self.stream_ai_provider(chat_prompt):
+                    if not header_printed:
+                        print(f"\n💬 {ai_provider.upper()} Response:")
+                        print("-" * 50)
+                        header_printed = True
+                    print(chunk, end="", flush=True)
+                print()
                 print("-" * 50)
 
             except KeyboardInterrupt:
@@ -509,6 +899,144 @@ Answer the user's question about the website analytics:"""
                 print(f"\n❌ Error in chat: {e}")
                 continue
 
+    async def _answer_batch(self, batch: list):
+        """Answer a batch of (question, future) pairs with one AI call"""
+        questions = [question for question, _ in batch]
+        try:
+            if len(batch) == 1:
+                prompt = await self.create_chat_prompt(questions[0])
+            else:
+                prompt = await self.create_batch_chat_prompt(questions)
+            ai_response, ai_provider = await self.call_ai_provider(prompt)
+            answers = (
+                split_batch_answers(ai_response, len(batch))
+                if len(batch) > 1
+                else [ai_response]
+            )
+            for (_, future), answer in zip(batch, answers):
+                if not future.done():
+                    future.set_result((answer, ai_provider))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def _batched_chat(
+        self, queue: asyncio.Queue, max_batch: int = 8, max_wait_ms: int = 50
+    ):
+        """Collect queued questions into batches and answer each with one call"""
+        loop = asyncio.get_running_loop()
+        in_flight = set()
+        stopping = False
+
+        # Send a batch once it is full or its first question has waited long
+        # enough; busier providers wait longer and get larger batches
+
+        try:
+            while not stopping:
+                item = await queue.get()
+                if item is None:
+                    break
+                batch = [item]
+
+                wait = max_wait_ms / 1000 * (1 + len(in_flight))
+                deadline = loop.time() + wait
+                while len(batch) < max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+
+                task = asyncio.create_task(self._answer_batch(batch))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        finally:
+            # Only has work to do when the collector itself is cancelled
+            for task in in_flight:
+                task.cancel()
+
+    async def batched_chat_mode(self, max_batch: int = 8, max_wait_ms: int = 50):
+        """Chat mode that answers questions read in quick succession together"""
+        print(
+            f"\n🤖 Entering batched chat mode using {self.ai_provider.upper()}! "
+            "Enter one question per line; questions arriving together are "
+            "answered in a single request."
+        )
+        print("Type 'quit', 'exit', or 'q' (or send EOF) to leave chat mode.\n")
+
+        loop = asyncio.get_running_loop()
+        questions: asyncio.Queue = asyncio.Queue()
+        pending: asyncio.Queue = asyncio.Queue()
+
+        async def print_answers():
+            while True:
+                item = await pending.get()
+                if item is None:
+                    break
+                question, future = item
+                try:
+                    ai_response, ai_provider = await future
+                except Exception as e:
+                    print(f"\n❌ Error in chat: {e}")
+                    continue
+                print(f"\n📊 {question}")
+                print(f"💬 {ai_provider.upper()} Response:")
+                print("-" * 50)
+                print(ai_response)
+                print("-" * 50)
+
+        if self._stdin is None:
+            self._stdin = _StdinLines()
+        lines: asyncio.Queue = asyncio.Queue()
+        self._stdin.attach(lines)
+
+        collector = asyncio.create_task(
+            self._batched_chat(questions, max_batch, max_wait_ms)
+        )
+        printer = asyncio.create_task(print_answers())
+
+        try:
+            while True:
+                line = await lines.get()
+                if line is None:
+                    break
+                user_input = line.strip()
+
+                if user_input.lower() in ["quit", "exit", "q"]:
+                    break
+
+                if not user_input:
+                    continue
+
+                future = loop.create_future()
+                await questions.put((user_input, future))
+                await pending.put((user_input, future))
+        except asyncio.CancelledError:
+            # asyncio.run delivers Ctrl-C as a cancellation of the main task
+            collector.cancel()
+            printer.cancel()
+            await asyncio.gather(collector, printer, return_exceptions=True)
+            print("\n\n👋 Exiting chat mode. Goodbye!")
+            return
+        finally:
+            # Hand unread lines back so a later session still gets them
+            self._stdin.detach(lines)
+
+        await questions.put(None)
+        await pending.put(None)
+        await asyncio.gather(collector, printer)
+        print("👋 Exiting chat mode. Goodbye!")
+
     async def create_dashboard(
         self,
         website_domain: str,
@@ -516,100 +1044,95 @@ Answer the user's question about the website analytics:"""
         end_date: str,
         timezone: str = "UTC",
         enable_chat: bool = False,
+        chat_batch: bool = False,
     ):
         """Main method to create dashboard"""
         try:
-            async with stdio_client(self.server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    print("✅ Connected to MCP server")
+            session = await self._get_mcp_session()
+            if session is None:
+                return
+
+            # Get real data
+            print(f"\n📊 Getting real data for {website_domain}...")
+            real_data = await self.get_real_data_from_mcp(
+                session, website_domain, start_date, end_date, timezone
+            )
 
-                    # Initialize session
-                    try:
-                        await session.initialize()
-                        print("✅ Session initialized")
-                    except Exception as init_error:
-                        print(f"❌ Initialization error: {init_error}")
-                        return
-
-                    # Get real data
-                    print(f"\n📊 Getting real data for {website_domain}...")
-                    real_data = await self.get_real_data_from_mcp(
-                        session, website_domain, start_date, end_date, timezone
-                    )
+            # Store data for chat mode
+            self.session_data = real_data
+            self._session_data_json = await asyncio.to_thread(dumps_pretty, real_data)
 
-                    # Store data for chat mode
-                    self.session_data = real_data
+            # Get MCP dashboard prompt
+            try:
+                prompts_response = await session.list_prompts()
+                prompts = [p.name for p in prompts_response.prompts]
+                if self._debug:
+                    self._debug_event("available_prompts", prompts=prompts)
+
+                if "Create Dashboard" in prompts:
+                    dashboard_args = {
+                        "Website Name": website_domain,
+                        "Start Date (YYYY-MM-DD)": start_date,
+                        "End Date (YYYY-MM-DD)": end_date,
+                        "Timezone": timezone,
+                    }
+
+                    prompt_response = await session.get_prompt(
+                        "Create Dashboard", dashboard_args
+                    )
 
-                    # Get MCP dashboard prompt
-                    try:
-                        prompts_response = await session.list_prompts()
-                        prompts = [p.name for p in prompts_response.prompts]
-                        print(f"📋 Available prompts: {prompts}")
-
-                        if "Create Dashboard" in prompts:
-                            dashboard_args = {
-                                "Website Name": website_domain,
-                                "Start Date (YYYY-MM-DD)": start_date,
-                                "End Date (YYYY-MM-DD)": end_date,
-                                "Timezone": timezone,
-                            }
-
-                            prompt_response = await session.get_prompt(
-                                "Create Dashboard", dashboard_args
+                    if prompt_response.messages:
+                        message_content = prompt_response.messages[0].content
+                        mcp_prompt = getattr(
+                            message_content, "text", str(message_content)
+                        )
+
+                        # Create validation prompt
+                        validation_prompt = await self.create_validation_prompt(
+                            mcp_prompt, real_data
+                        )
+
+                        # Get AI response
+                        print(
+                            f"\n🤖 Generating dashboard with {self.ai_provider.upper()}..."
+                        )
+                        ai_response, ai_provider = await self.call_ai_provider(
+                            validation_prompt
+                        )
+
+                        print(f"\n📈 DASHBOARD ANALYSIS ({ai_provider.upper()}):")
+                        print("=" * 80)
+                        print(ai_response)
+                        print("=" * 80)
+
+                        # Check for hallucinations
+                        hallucination_indicators = self.detect_hallucinations(
+                            ai_response
+                        )
+                        if hallucination_indicators:
+                            print(
+                                f"\n⚠️  Potential data fabrication detected: {hallucination_indicators}"
                             )
-
-                            if prompt_response.messages:
-                                message_content = prompt_response.messages[0].content
-                                mcp_prompt = getattr(
-                                    message_content, "text", str(message_content)
-                                )
-
-                                # Create validation prompt
-                                validation_prompt = await self.create_validation_prompt(
-                                    mcp_prompt, real_data
-                                )
-
-                                # Get AI response
-                                print(
-                                    f"\n🤖 Generating dashboard with {self.ai_provider.upper()}..."
-                                )
-                                ai_response, ai_provider = await self.call_ai_provider(
-                                    validation_prompt
-                                )
-
-                                print(
-                                    f"\n📈 DASHBOARD ANALYSIS ({ai_provider.upper()}):"
-                                )
-                                print("=" * 80)
-                                print(ai_response)
-                                print("=" * 80)
-
-                                # Check for hallucinations
-                                hallucination_indicators = self.detect_hallucinations(
-                                    ai_response
-                                )
-                                if hallucination_indicators:
-                                    print(
-                                        f"\n⚠️  Potential data fabrication detected: {hallucination_indicators}"
-                                    )
-                                else:
-                                    print(
-                                        "\n✅ Analysis appears to be based on real data"
-                                    )
-
-                                # Enter chat mode if enabled
-                                if enable_chat:
-                                    await self.chat_mode()
-
-                            else:
-                                print("❌ No content in prompt result")
                         else:
-                            print("❌ 'Create Dashboard' prompt not available")
+                            print("\n✅ Analysis appears to be based on real data")
 
-                    except Exception as prompt_error:
-                        print(f"❌ Error with prompts: {prompt_error}")
+                        # Enter chat mode if enabled
+                        if enable_chat and chat_batch:
+                            await self.batched_chat_mode()
+                        elif enable_chat:
+                            await self.chat_mode()
+
+                    else:
+                        print("❌ No content in prompt result")
+                else:
+                    print("❌ 'Create Dashboard' prompt not available")
+
+            except Exception as prompt_error:
+                self._check_mcp_error(prompt_error)
+                print(f"❌ Error with prompts: {prompt_error}")
 
         except Exception as e:
+            self._check_mcp_error(e)
             print(f"❌ Error in dashboard creation: {e}")
             import traceback
 
@@ -640,12 +1163,22 @@ def parse_arguments():
         action="store_true",
         help="Enable interactive chat mode after generating report",
     )
+    parser.add_argument(
+        "--chat-batch",
+        action="store_true",
+        help="Enable chat mode that batches questions into fewer AI calls",
+    )
     parser.add_argument(
         "--ai-provider",
         choices=["cloudflare", "ollama", "gemini-cli"],
         default="gemini-cli",
         help="AI provider to use (default: cloudflare)",
     )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Print diagnostic output as JSON lines",
+    )
 
     return parser.parse_args()
 
@@ -659,14 +1192,22 @@ async def main():
     print(f"   Date Range: {args.start_date} to {args.end_date}")
     print(f"   Timezone: {args.timezone}")
     print(f"   AI Provider: {args.ai_provider.upper()}")
-    print(f"   Chat Mode: {'Enabled' if args.chat else 'Disabled'}")
+    enable_chat = args.chat or args.chat_batch
+    print(f"   Chat Mode: {'Enabled' if enable_chat else 'Disabled'}")
     print()
 
     # Create dashboard
-    dashboard = AnalyticsDashboard(args.mcp_server_dir, args.ai_provider)
-    await dashboard.create_dashboard(
-        args.website, args.start_date, args.end_date, args.timezone, args.chat
-    )
+    async with AnalyticsDashboard(
+        args.mcp_server_dir, args.ai_provider, debug=args.debug
+    ) as dashboard:
+        await dashboard.create_dashboard(
+            args.website,
+            args.start_date,
+            args.end_date,
+            args.timezone,
+            enable_chat,
+            args.chat_batch,
+        )
 
 
 if __name__ == "__main__":